@@ -0,0 +1,155 @@
+import collections
+import functools
+import inspect
+import threading
+
+_MISSING = object()  # Marks a key that is not in the cache, since None is a valid result
+
+
+class AnalyticsCache:
+    """
+    A size-bounded, least-recently-used cache for the results of read-only queries.
+
+    All entries belong to one data version. The version is looked up on every access through
+    the `version` callable, and the whole cache is dropped as soon as it changes, so results
+    never outlive the data they were computed from. The cache can be shared between threads.
+    """
+
+    def __init__(self, maxsize=128, version=None):
+        """
+        Initialize an empty cache.
+
+        Parameters:
+        - maxsize: int, the maximum number of results kept before the least recently used
+                   one is evicted.
+        - version: callable or None, returns a hashable token that changes whenever the
+                   underlying data changes. Without one, entries never expire.
+        """
+        self.maxsize = maxsize
+        self.version = version
+        self._entries = collections.OrderedDict()
+        self._entries_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()  # Guards the entries, their version and the statistics
+
+    def _check_version(self):
+        """
+        Drop all entries if the data version changed since they were stored. Must be called
+        with the lock held.
+
+        Returns:
+        - The current data version.
+        """
+        if self.version is None:
+            return None
+        current = self.version()
+        if current != self._entries_version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._entries_version = current
+        return current
+
+    def memoize(self, func=None, *, normalize=None):
+        """
+        Decorate a function so that its results are cached, keyed on its arguments.
+
+        Arguments are bound to the function's signature with defaults applied, so positional,
+        keyword and omitted default arguments with the same values share one entry. Calls
+        with unhashable arguments bypass the cache. List results are copied on the way out so
+        that callers cannot modify the cached value.
+
+        Can be used as `@cache.memoize` or `@cache.memoize(normalize=...)`.
+
+        Parameters:
+        - func: callable, the function to cache.
+        - normalize: dict or None, maps argument names to functions that bring equivalent
+                     values into one form, e.g. {'period': normalize_period}. They are applied
+                     to arguments that are not None, before the key is built and the function
+                     is called.
+
+        Returns:
+        - callable: The caching wrapper.
+        """
+        if func is None:
+            return lambda func: self.memoize(func, normalize=normalize)
+        signature = inspect.signature(func)
+        var_keyword = [name for name, parameter in signature.parameters.items()
+                       if parameter.kind is inspect.Parameter.VAR_KEYWORD]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                return func(*args, **kwargs)  # Raises the usual error for bad arguments
+            bound.apply_defaults()
+            for name, normalizer in (normalize or {}).items():
+                if bound.arguments.get(name) is not None:
+                    bound.arguments[name] = normalizer(bound.arguments[name])
+            arguments = dict(bound.arguments)
+            for name in var_keyword:
+                arguments[name] = tuple(sorted(arguments[name].items()))
+            key = (func.__qualname__, tuple(arguments.items()))
+            try:
+                hash(key)
+            except TypeError:
+                return func(*bound.args, **bound.kwargs)
+
+            with self._lock:
+                version = self._check_version()
+                result = self._entries.get(key, _MISSING)
+                if result is _MISSING:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+
+            if result is _MISSING:
+                # Run the query without holding the lock, then store the result only if the
+                # data did not change in the meantime
+                result = func(*bound.args, **bound.kwargs)
+                with self._lock:
+                    if self._check_version() == version:
+                        self._entries[key] = result
+                        if len(self._entries) > self.maxsize:
+                            self._entries.popitem(last=False)
+                            self.evictions += 1
+            return list(result) if isinstance(result, list) else result
+
+        return wrapper
+
+    def clear(self):
+        """
+        Remove all cached results and reset the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._entries_version = None
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    def stats(self):
+        """
+        Get the usage statistics of the cache.
+
+        Returns:
+        - dict: The number of hits, misses, evictions and invalidations, the current and
+                maximum size, and the hit rate as a fraction between 0 and 1.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
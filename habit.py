@@ -1,8 +1,21 @@
 import sqlite3
 import datetime
+import threading
+
+from cache import AnalyticsCache
+from period import compile_period, normalize_period
 
 class Habit:
     db_file = 'habits.db'  # SQLite database file name
+    fetch_size = 500  # Number of rows fetched per round trip when streaming query results
+    schema_version = 1  # PRAGMA user_version of a database whose stored periods are normalized
+
+    # Results of the analytics queries, dropped whenever the database changes
+    analytics_cache = AnalyticsCache(maxsize=256, version=lambda: Habit.data_version())
+    _write_generation = 0  # Incremented after every write made through this class
+    _version_conn = None  # Long-lived connection used to read PRAGMA data_version
+    _version_db_file = None  # Database file that _version_conn is connected to
+    _version_lock = threading.Lock()  # Serializes the use of _version_conn across threads
 
     def __init__(self, name, period):
         """
@@ -10,10 +23,11 @@ class Habit:
 
         Parameters:
         - name: str, the name of the habit.
-        - period: str, the frequency of the habit, either 'daily' or 'weekly'.
+        - period: str, the frequency of the habit, e.g. 'daily', 'weekly' or any other
+                  specification understood by `period.compile_period`.
         """
         self.name = name
-        self.period = period
+        self.period = normalize_period(period)
         self.created_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.completed_at = []  # List to store timestamps of habit completions
         self.streak = 0  # Current streak of the habit
@@ -24,17 +38,75 @@ class Habit:
         self.create_table()
 
     @staticmethod
-    def create_table():
+    def create_table(db_file=None):
         """
         Create the database table for storing habits if it doesn't exist.
+
+        Parameters:
+        - db_file: str or None, the SQLite database file, `Habit.db_file` by default.
         """
-        with sqlite3.connect(Habit.db_file) as conn:
+        with sqlite3.connect(db_file or Habit.db_file) as conn:
             c = conn.cursor()
             c.execute('''CREATE TABLE IF NOT EXISTS habits
                          (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, period TEXT, created_at TEXT,
                           completed_at TEXT, streak INTEGER,
                           longest_streak INTEGER, missed_periods INTEGER)''')
+            # Indexes backing the name-ordered, keyset-paginated habit listings, the per-habit
+            # lookups and the streak repair in repair.py
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_habits_name_period ON habits (name, period)''')
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_habits_period_name ON habits (period, name)''')
+            # Covered by idx_habits_name_period, dropped from databases created before it existed
+            c.execute('''DROP INDEX IF EXISTS idx_habits_name''')
+            # Periods are looked up in canonical form, so rewrite the free-text periods stored
+            # by earlier versions once
+            if c.execute('PRAGMA user_version').fetchone()[0] < Habit.schema_version:
+                Habit._normalize_periods(c)
+                c.execute(f'PRAGMA user_version = {Habit.schema_version}')
+            conn.commit()
+
+    @staticmethod
+    def _normalize_periods(c):
+        """
+        Rewrite every stored period to its canonical form, e.g. 'Daily' to 'daily'.
+
+        Parameters:
+        - c: sqlite3.Cursor, a cursor of the connection to update; the caller commits.
+
+        Returns:
+        - int: The number of rows whose period was rewritten.
+        """
+        c.execute('''SELECT DISTINCT period FROM habits WHERE period IS NOT NULL''')
+        periods = [row[0] for row in c.fetchall()]
+        changed = 0
+        for period in periods:
+            if not isinstance(period, str):
+                continue
+            canonical = normalize_period(period)
+            if canonical != period:
+                c.execute('''UPDATE habits SET period=? WHERE period=?''', (canonical, period))
+                changed += c.rowcount
+        if changed:
+            Habit._write_generation += 1
+        return changed
+
+    @staticmethod
+    def normalize_stored_periods(db_file=None):
+        """
+        Rewrite every stored period to its canonical form, e.g. 'Daily' to 'daily'.
+
+        `create_table` does this once per database; call this after writing periods to the
+        database without going through the Habit class.
+
+        Parameters:
+        - db_file: str or None, the SQLite database file, `Habit.db_file` by default.
+
+        Returns:
+        - int: The number of rows whose period was rewritten.
+        """
+        with sqlite3.connect(db_file or Habit.db_file) as conn:
+            changed = Habit._normalize_periods(conn.cursor())
             conn.commit()
+        return changed
 
     def save_to_db(self):
         """
@@ -50,6 +122,7 @@ class Habit:
                       (self.name, self.period, str(self.created_at), completed_at_str,
                        self.streak, self.longest_streak, self.missed_periods))
             conn.commit()
+        Habit._write_generation += 1
 
     def delete_habit(self):
         """
@@ -59,6 +132,29 @@ class Habit:
             c = conn.cursor()
             c.execute('''DELETE FROM habits WHERE name=? AND period=?''', (self.name, self.period))
             conn.commit()
+        Habit._write_generation += 1
+
+    @staticmethod
+    def data_version():
+        """
+        Get a token that changes whenever the habit data in the database changes.
+
+        Writes made through this class bump a generation counter. Writes from any other
+        connection, including other processes, change SQLite's `PRAGMA data_version` as seen
+        from a connection that is kept open for this purpose.
+
+        Returns:
+        - tuple: The database file, the write generation and the SQLite data version.
+        """
+        with Habit._version_lock:
+            db_file = Habit.db_file
+            if Habit._version_conn is None or Habit._version_db_file != db_file:
+                if Habit._version_conn is not None:
+                    Habit._version_conn.close()
+                Habit._version_conn = sqlite3.connect(db_file, check_same_thread=False)
+                Habit._version_db_file = db_file
+            data_version = Habit._version_conn.execute('PRAGMA data_version').fetchone()[0]
+            return (db_file, Habit._write_generation, data_version)
 
     def load_from_db(self):
         """
@@ -92,40 +188,73 @@ class Habit:
         self.calculate_streak()  # Update streak and missed periods based on the current check-off
         self.save_to_db()  # Save immediately after checking off
 
+    def load_history(self):
+        """
+        Load the creation time and completions recorded in all stored rows of the habit.
+
+        Every check-off stores a new row, so the full history of a habit is spread over all of
+        its rows. Values that cannot be parsed are left out; `repair.py` reports them.
+
+        Returns:
+        - tuple: The earliest creation time, or None if no row has a valid one, and the set of
+                 all completion times.
+        """
+        earliest = None
+        timestamps = set()
+        with sqlite3.connect(Habit.db_file) as conn:
+            c = conn.cursor()
+            c.execute('''SELECT created_at, completed_at FROM habits WHERE name=? AND period=?''',
+                      (self.name, self.period))
+            while True:
+                rows = c.fetchmany(Habit.fetch_size)
+                if not rows:
+                    break
+                for created_at, completed_at in rows:
+                    try:
+                        created_at = datetime.datetime.fromisoformat(created_at)
+                    except (TypeError, ValueError):
+                        pass
+                    else:
+                        if earliest is None or created_at < earliest:
+                            earliest = created_at
+                    if isinstance(completed_at, str):
+                        timestamps.update(dt_str for dt_str in completed_at.split(',') if dt_str)
+
+        completions = set()
+        for dt_str in timestamps:
+            try:
+                completions.add(datetime.datetime.fromisoformat(dt_str))
+            except ValueError:
+                pass
+        return earliest, completions
+
     def calculate_streak(self):
         """
-        Calculate the current streak and update missed periods.
+        Calculate the current streak, longest streak and missed periods from the completion history.
+
+        The history is the union of the completions of this habit and of all its stored rows.
+        Every completion is mapped to its period, counted from the earliest creation time, and
+        several completions within one period count once. `repair.py` derives the stored
+        statistics of every row in the same way.
+
+        Raises:
+        - ValueError: If the period of the habit is not a valid period specification.
         """
         if not self.completed_at:
             self.streak = 0
             return
 
         created_at = self.created_at
-        now = self.completed_at[-1]  # The current check-off time
+        if isinstance(created_at, str):  # Not loaded from the database yet
+            created_at = datetime.datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
 
-        if self.period == 'daily':
-            # Calculate the difference in days between the check-off and the last habit creation/check-off
-            delta = (now.date() - created_at.date()).days
+        stored_created_at, completions = self.load_history()
+        if stored_created_at is not None and stored_created_at < created_at:
+            created_at = stored_created_at
+        completions.update(self.completed_at)
 
-            if delta <= 1:
-                self.streak += 1
-            elif delta > 1:
-                self.missed_periods += delta - 1
-                self.streak = 1  # Reset streak since a day was missed
-
-        elif self.period == 'weekly':
-            # Calculate the difference in weeks between the check-off and the last habit creation/check-off
-            delta = (now.date() - created_at.date()).days // 7
-
-            if delta <= 1:
-                self.streak += 1
-            elif delta > 1:
-                self.missed_periods += delta - 1
-                self.streak = 1  # Reset streak since a week was missed
-
-        # Update the longest streak if the current streak is the highest
-        if self.streak > self.longest_streak:
-            self.longest_streak = self.streak
+        calendar = compile_period(self.period)
+        self.streak, self.longest_streak, self.missed_periods = calendar.streak_stats(completions, created_at)
 
     def get_longest_streak(self):
         """
@@ -189,25 +318,120 @@ class Habit:
             c = conn.cursor()
             c.execute('''
                 SELECT EXISTS(SELECT 1 FROM habits WHERE name=? AND period=?)
-            ''', (name, period))
+            ''', (name, normalize_period(period)))
             result = c.fetchone()[0]
         return result
 
     @staticmethod
+    def _iter_habit_names(period=None, after=None, limit=None, descending=False):
+        """
+        Stream unique habit names from the database in name order.
+
+        Rows are fetched in batches of `Habit.fetch_size` with `fetchmany`, so only one batch
+        is held in memory at a time. Pagination uses the last name seen as a keyset instead of
+        an OFFSET, which keeps every page equally cheap on large tables.
+
+        Parameters:
+        - period: str or None, only yield habits with this period if given.
+        - after: str or None, only yield names sorted after this one (the keyset).
+        - limit: int or None, the maximum number of names to yield.
+        - descending: bool, yield names in descending instead of ascending order.
+
+        Yields:
+        - str: The next unique habit name.
+        """
+        conditions = []
+        params = []
+        if period is not None:
+            conditions.append('period = ?')
+            params.append(period)
+        if after is not None:
+            conditions.append('name < ?' if descending else 'name > ?')
+            params.append(after)
+
+        query = 'SELECT DISTINCT name FROM habits'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY name DESC' if descending else ' ORDER BY name ASC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        conn = sqlite3.connect(Habit.db_file)
+        try:
+            c = conn.cursor()
+            c.execute(query, params)
+            while True:
+                rows = c.fetchmany(Habit.fetch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row[0]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def iter_all_habits(after=None, limit=None, descending=False):
+        """
+        Stream all unique habit names stored in the database.
+
+        Parameters:
+        - after: str or None, only yield names sorted after this one, e.g. the last name of the previous page.
+        - limit: int or None, the maximum number of names to yield.
+        - descending: bool, yield names in descending instead of ascending order.
+
+        Yields:
+        - str: The next unique habit name.
+        """
+        return Habit._iter_habit_names(after=after, limit=limit, descending=descending)
+
+    @staticmethod
+    def iter_habits_by_period(period, after=None, limit=None, descending=False):
+        """
+        Stream unique habit names filtered by their period (e.g., 'daily', 'weekly').
+
+        Parameters:
+        - period: str, the frequency of the habits to filter by.
+        - after: str or None, only yield names sorted after this one, e.g. the last name of the previous page.
+        - limit: int or None, the maximum number of names to yield.
+        - descending: bool, yield names in descending instead of ascending order.
+
+        Yields:
+        - str: The next unique habit name that matches the specified period.
+        """
+        return Habit._iter_habit_names(period=normalize_period(period), after=after, limit=limit, descending=descending)
+
+    @staticmethod
+    @analytics_cache.memoize(normalize={'period': normalize_period})
+    def get_habits_page(period=None, after=None, limit=20):
+        """
+        Get one page of unique habit names, optionally filtered by period.
+
+        Parameters:
+        - period: str or None, only include habits with this period if given.
+        - after: str or None, the last name of the previous page, or None for the first page.
+        - limit: int, the maximum number of names on the page.
+
+        Returns:
+        - list: Up to `limit` unique habit names sorted after `after`.
+        """
+        if period is None:
+            return list(Habit.iter_all_habits(after=after, limit=limit))
+        return list(Habit.iter_habits_by_period(period, after=after, limit=limit))
+
+    @staticmethod
+    @analytics_cache.memoize
     def get_all_habits():
         """
         Get a list of all unique habits stored in the database.
 
         Returns:
-        - list: A list of unique habit names.
+        - list: A list of unique habit names, sorted by name.
         """
-        with sqlite3.connect(Habit.db_file) as conn:
-            c = conn.cursor()
-            c.execute('''SELECT DISTINCT name FROM habits''')
-            habits = [row[0] for row in c.fetchall()]
-        return list(set(habits))  # Ensure uniqueness using set
+        return list(Habit.iter_all_habits())
 
     @staticmethod
+    @analytics_cache.memoize(normalize={'period': normalize_period})
     def get_habits_by_period(period):
         """
         Get a list of habits filtered by their period (e.g., 'daily', 'weekly').
@@ -216,15 +440,12 @@ class Habit:
         - period: str, the frequency of the habits to filter by.
 
         Returns:
-        - list: A list of unique habit names that match the specified period.
+        - list: A list of unique habit names that match the specified period, sorted by name.
         """
-        with sqlite3.connect(Habit.db_file) as conn:
-            c = conn.cursor()
-            c.execute('''SELECT DISTINCT name FROM habits WHERE period=?''', (period,))
-            habits = [row[0] for row in c.fetchall()]
-        return list(set(habits))  # Ensure uniqueness using set
+        return list(Habit.iter_habits_by_period(period))
 
     @staticmethod
+    @analytics_cache.memoize
     def get_longest_run_streak_all():
         """
         Get the longest streak for each unique habit stored in the database.
@@ -243,6 +464,7 @@ class Habit:
         return habit_streaks
 
     @staticmethod
+    @analytics_cache.memoize(normalize={'period': normalize_period})
     def get_longest_run_streak(name, period):
         """
         Get the longest streak for a specific habit and period.
@@ -260,7 +482,7 @@ class Habit:
                 SELECT MAX(longest_streak) AS max_streak
                 FROM habits
                 WHERE name = ? AND period = ?
-            ''', (name, period))
+            ''', (name, normalize_period(period)))
             max_streak = c.fetchone()[0]  # Get the max streak value
         return max_streak if max_streak is not None else 0  # Return 0 if no records are found
 
@@ -1,4 +1,33 @@
 from habit import Habit
+from period import compile_period
+
+PAGE_SIZE = 20  # Number of habit names shown per page in listings
+PERIOD_HINT = "(e.g. daily, weekly, monthly, every 3 days, on mon,wed,fri)"  # Shown in every period prompt
+
+def print_habit_pages(title, fetch_page):
+    """
+    Print a habit listing one page at a time.
+
+    Parameters:
+    - title: str, the heading printed above the listing.
+    - fetch_page: callable, takes the last name of the previous page (or None) and a limit,
+                  and returns a list of habit names for the next page.
+    """
+    print(title)
+    last_name = None
+    while True:
+        page = fetch_page(last_name, PAGE_SIZE)
+        if not page:
+            if last_name is None:
+                print("No habits found.")
+            break
+        for name in page:
+            print(f"- {name}")
+        last_name = page[-1]
+        if len(page) < PAGE_SIZE:
+            break
+        if input("Press Enter to show more, or 'q' to stop: ").strip().lower() == "q":
+            break
 
 def user_interface():
     print("Welcome to the Habit Tracker!")
@@ -15,7 +44,14 @@ def user_interface():
 
         if choice == "1":
             name = input("Enter the habit name: ")
-            period = input("Enter the period (daily/weekly): ")
+            period = input(f"Enter the period {PERIOD_HINT}: ")
+
+            # Make sure the period can be tracked before storing the habit
+            try:
+                compile_period(period)
+            except ValueError as error:
+                print(f"{error}. Please try again.")
+                continue
 
             # Check if the habit already exists in the database
             habit_exists = Habit.check_habit_exists(name, period)
@@ -29,10 +65,14 @@ def user_interface():
         
         elif choice == "2":
             name = input("Enter the habit name: ")
-            period = input("Enter the period (daily/weekly): ")
+            period = input(f"Enter the period {PERIOD_HINT}: ")
             habit = Habit(name, period)
             habit.load_from_db()
-            habit.check_off()
+            try:
+                habit.check_off()
+            except ValueError as error:
+                print(f"{error}. Habit '{name}' was not checked off.")
+                continue
             print(f"Habit '{name}' checked off.")
         
         elif choice == "3":
@@ -41,17 +81,20 @@ def user_interface():
             print("2. View habits with the same periodicity")
             print("3. View the longest streak of all habits")
             print("4. View the longest streak for a specific habit")
+            print("5. View analytics cache statistics")
 
             analysis_choice = input("Enter your choice: ")
 
             if analysis_choice == "1":
-                habits = Habit.get_all_habits()
-                print(f"All tracked habits: {habits}")
+                print_habit_pages(
+                    "All tracked habits:",
+                    lambda after, limit: Habit.get_habits_page(after=after, limit=limit))
             
             elif analysis_choice == "2":
-                period = input("Enter the period to filter by (daily/weekly): ")
-                habits = Habit.get_habits_by_period(period)
-                print(f"Habits with {period} periodicity: {habits}")
+                period = input(f"Enter the period to filter by {PERIOD_HINT}: ")
+                print_habit_pages(
+                    f"Habits with {period} periodicity:",
+                    lambda after, limit: Habit.get_habits_page(period, after=after, limit=limit))
             
             elif analysis_choice == "3":
                 habit_streaks = Habit.get_longest_run_streak_all()
@@ -61,16 +104,22 @@ def user_interface():
             
             elif analysis_choice == "4":
                 name = input("Enter the habit name: ")
-                period = input("Enter the period (daily/weekly): ")
+                period = input(f"Enter the period {PERIOD_HINT}: ")
                 max_streak = Habit.get_longest_run_streak(name, period)
                 print(f"The longest streak for the habit '{name}' during the {period} period is {max_streak}.")
 
+            elif analysis_choice == "5":
+                stats = Habit.analytics_cache.stats()
+                print(f"Cached results: {stats['size']} of {stats['maxsize']}")
+                print(f"Hits: {stats['hits']}, misses: {stats['misses']}, hit rate: {stats['hit_rate']:.1%}")
+                print(f"Evictions: {stats['evictions']}, invalidations: {stats['invalidations']}")
+
             else:
                 print("Invalid choice. Please try again.")
         
         elif choice == "4":
             name = input("Enter the habit name: ")
-            period = input("Enter the period (daily/weekly): ")
+            period = input(f"Enter the period {PERIOD_HINT}: ")
             habit_to_delete = Habit(name, period)  # Create an instance of the Habit class
             habit_to_delete.delete_habit()  # Call the delete_habit method
             print(f"The habit '{name}' during the {period} period has been deleted.")
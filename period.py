@@ -0,0 +1,320 @@
+import datetime
+import functools
+import re
+
+# Weekday abbreviations in `datetime.weekday()` order (Monday is 0)
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+WEEKDAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+_EVERY_PATTERN = re.compile(r'^every\s+(\d+)\s+(day|week|month)s?$')
+
+
+class Period:
+    """
+    A compiled period specification.
+
+    A period maps every timestamp to an integer period index, so that two completions fall in
+    the same period exactly when their indices are equal and consecutive periods have
+    consecutive indices. All index functions are O(1) per timestamp.
+    """
+
+    def __init__(self, spec, kind, step=1, weekdays=(), tz=None):
+        """
+        Initialize a compiled period. Use `compile_period` instead of calling this directly.
+
+        Parameters:
+        - spec: str, the canonical period specification.
+        - kind: str, one of 'days', 'months', 'isoweeks' or 'weekdays'.
+        - step: int, the number of days or months per period.
+        - weekdays: collection of int, the scheduled weekdays (Monday is 0) for the 'weekdays' kind.
+        - tz: tzinfo or None, the timezone whose wall clock defines period boundaries. Naive
+              timestamps are converted from the system's local time.
+        """
+        self.spec = spec
+        self.kind = kind
+        self.step = step
+        self.weekdays = weekdays
+        self.tz = tz
+        self._raw_index = self._compile_raw_index()
+
+    def _compile_raw_index(self):
+        """
+        Build the function mapping a timestamp to its period index counted from 0001-01-01.
+
+        Returns:
+        - callable: A function taking a date or datetime and returning an int.
+        """
+        tz = self.tz
+
+        def to_local(ts):
+            # Datetimes are converted to the period's timezone. Naive ones, like the
+            # `datetime.now()` values stored by `Habit`, are taken to be in the system's local
+            # time. Plain dates are used as they are.
+            if tz is not None and isinstance(ts, datetime.datetime):
+                return ts.astimezone(tz)
+            return ts
+
+        if self.kind == 'days':
+            return lambda ts: to_local(ts).toordinal()
+
+        if self.kind == 'months':
+            def month_index(ts):
+                ts = to_local(ts)
+                return ts.year * 12 + ts.month - 1
+            return month_index
+
+        if self.kind == 'isoweeks':
+            # 0001-01-01 has ordinal 1 and is a Monday, so this counts ISO weeks
+            return lambda ts: (to_local(ts).toordinal() - 1) // 7
+
+        # 'weekdays': each scheduled weekday opens a period that lasts until the next one.
+        # offsets[d] is the number of scheduled days up to and including weekday d, minus
+        # one, so days before the first scheduled day of a week map to the previous week.
+        per_week = len(self.weekdays)
+        offsets = []
+        count = 0
+        for day in range(7):
+            if day in self.weekdays:
+                count += 1
+            offsets.append(count - 1)
+        offsets = tuple(offsets)
+
+        def weekday_index(ts):
+            days = to_local(ts).toordinal() - 1
+            return (days // 7) * per_week + offsets[days % 7]
+        return weekday_index
+
+    def indexer(self, anchor=None):
+        """
+        Get a function mapping a timestamp to its period index.
+
+        Parameters:
+        - anchor: date, datetime or None, the timestamp whose period gets index 0. Periods of
+                  N days or N months are counted from the anchor; without one, indices are
+                  absolute.
+
+        Returns:
+        - callable: A function taking a date or datetime and returning an int.
+        """
+        raw_index = self._raw_index
+        step = self.step
+        base = raw_index(anchor) if anchor is not None else 0
+        if step == 1:
+            if base == 0:
+                return raw_index
+            return lambda ts: raw_index(ts) - base
+        return lambda ts: (raw_index(ts) - base) // step
+
+    def index(self, timestamp, anchor=None):
+        """
+        Get the period index of a single timestamp.
+
+        Parameters:
+        - timestamp: date or datetime, the timestamp to map.
+        - anchor: date, datetime or None, see `indexer`.
+
+        Returns:
+        - int: The period index of the timestamp.
+        """
+        return self.indexer(anchor)(timestamp)
+
+    def indices(self, timestamps, anchor=None):
+        """
+        Get the period indices of a batch of timestamps.
+
+        The index function is compiled once for the batch and then mapped over it.
+
+        Parameters:
+        - timestamps: iterable of date or datetime, the timestamps to map.
+        - anchor: date, datetime or None, see `indexer`.
+
+        Returns:
+        - list: The period index of each timestamp, in input order.
+        """
+        return list(map(self.indexer(anchor), timestamps))
+
+    def streak_stats(self, timestamps, anchor):
+        """
+        Compute the streak statistics of a completion history.
+
+        Parameters:
+        - timestamps: iterable of date or datetime, the completion timestamps.
+        - anchor: date or datetime, the creation time of the habit.
+
+        Returns:
+        - tuple: The current streak, the longest streak and the number of missed periods.
+        """
+        return streak_stats(self.indices(timestamps, anchor))
+
+    def __eq__(self, other):
+        return isinstance(other, Period) and self.spec == other.spec
+
+    def __hash__(self):
+        return hash(self.spec)
+
+    def __repr__(self):
+        return f"Period({self.spec!r})"
+
+
+def streak_stats(indices, start_index=0, initial=None):
+    """
+    Compute streak statistics from the period indices of a completion history.
+
+    Several completions within one period count once. A completion in the period of
+    `start_index` or the one right after it does not count any missed period.
+    `Habit.calculate_streak` and `repair.py` both apply this to the union of the completions
+    in all stored rows of a habit, counted from its earliest creation time.
+
+    Parameters:
+    - indices: iterable of int, the period indices of the completions.
+    - start_index: int, the period index of the habit's creation.
+    - initial: tuple or None, the (streak, longest_streak, missed_periods, latest index) of
+               earlier completions to continue from. All `indices` must then be later than
+               the latest index; `start_index` is ignored.
+
+    Returns:
+    - tuple: The current streak, the longest streak and the number of missed periods.
+    """
+    if initial is None:
+        streak, longest_streak, missed_periods, previous = 0, 0, 0, start_index
+    else:
+        streak, longest_streak, missed_periods, previous = initial
+    for index in sorted(set(indices)):
+        gap = index - previous - 1
+        if gap > 0:
+            missed_periods += gap
+            streak = 1
+        else:
+            streak += 1
+        if streak > longest_streak:
+            longest_streak = streak
+        previous = index
+    return streak, longest_streak, missed_periods
+
+
+def _parse_weekday(name):
+    """
+    Parse a weekday name or abbreviation (e.g. 'mon', 'Monday') into its number.
+    """
+    name = name.strip()
+    if len(name) >= 3:
+        for number, full_name in enumerate(WEEKDAY_NAMES):
+            if full_name.startswith(name):
+                return number
+    raise ValueError(f"Unknown weekday '{name}'")
+
+
+@functools.lru_cache(maxsize=1)
+def _timezone_keys():
+    """
+    Map the lowercased IANA names of all available timezones to their proper spelling.
+    """
+    from zoneinfo import available_timezones
+    return {key.lower(): key for key in available_timezones()}
+
+
+def _load_timezone(name):
+    """
+    Load a timezone by its IANA name (e.g. 'Europe/Berlin'), or UTC for 'utc'. Names are
+    matched case-insensitively.
+    """
+    if name.lower() == 'utc':
+        return datetime.timezone.utc
+    try:
+        from zoneinfo import ZoneInfo
+    except ImportError:  # Python < 3.9
+        raise ValueError(f"Timezone '{name}' requires Python 3.9 or later")
+    # Look up the proper spelling first, so that e.g. 'europe/berlin' gets the key 'Europe/Berlin'
+    key = _timezone_keys().get(name.lower(), name)
+    try:
+        return ZoneInfo(key)
+    except Exception:
+        raise ValueError(f"Unknown timezone '{name}'")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_period(spec):
+    """
+    Compile a period specification into a `Period`.
+
+    Supported specifications (case-insensitive, including timezone names):
+    - 'daily', 'weekly', 'monthly'
+    - 'isoweekly': calendar weeks from Monday to Sunday
+    - 'every N days', 'every N weeks', 'every N months'
+    - 'on mon,wed,fri': specific weekdays
+    Any of them can be followed by '@<timezone>', e.g. 'daily@Europe/Berlin', to count periods
+    on that timezone's wall clock; naive timestamps are read as system local time. Equivalent
+    specifications compile to the same canonical `Period.spec`. Results are cached, so
+    compiling the same specification again is a dictionary lookup.
+
+    Parameters:
+    - spec: str, the period specification.
+
+    Returns:
+    - Period: The compiled period.
+
+    Raises:
+    - ValueError: If the specification is not understood.
+    """
+    body, _, tz_name = spec.partition('@')
+    body = ' '.join(body.lower().split())
+    tz_name = tz_name.strip()
+    tz = _load_timezone(tz_name) if tz_name else None
+    # Build the suffix from the loaded timezone so that e.g. '@utc' and '@UTC' are the same
+    suffix = ''
+    if tz is datetime.timezone.utc:
+        suffix = '@UTC'
+    elif tz is not None:
+        suffix = f'@{tz.key}'
+
+    kind, step, weekdays = None, 1, ()
+    if body == 'daily':
+        kind = 'days'
+    elif body == 'weekly':
+        kind, step = 'days', 7
+    elif body == 'monthly':
+        kind = 'months'
+    elif body in ('isoweekly', 'iso-weekly', 'iso weekly'):
+        kind = 'isoweeks'
+    elif _EVERY_PATTERN.match(body):
+        count, unit = _EVERY_PATTERN.match(body).groups()
+        count = int(count)
+        if count < 1:
+            raise ValueError(f"Unknown period '{spec}'")
+        if unit == 'month':
+            kind, step = 'months', count
+        else:
+            kind, step = 'days', count * 7 if unit == 'week' else count
+    elif body.startswith('on '):
+        weekdays = tuple(sorted({_parse_weekday(day) for day in body[3:].split(',')}))
+        kind = 'days' if len(weekdays) == 7 else 'weekdays'
+
+    if kind is None:
+        raise ValueError(f"Unknown period '{spec}'")
+
+    if kind == 'days':
+        name = {1: 'daily', 7: 'weekly'}.get(step, f'every {step} days')
+    elif kind == 'months':
+        name = 'monthly' if step == 1 else f'every {step} months'
+    elif kind == 'isoweeks':
+        name = 'isoweekly'
+    else:
+        name = 'on ' + ','.join(WEEKDAYS[day] for day in weekdays)
+        weekdays = frozenset(weekdays)
+    return Period(name + suffix, kind, step, weekdays, tz)
+
+
+def normalize_period(spec):
+    """
+    Get the canonical form of a period specification, e.g. 'Every 7 days' -> 'weekly'.
+
+    Parameters:
+    - spec: str, the period specification.
+
+    Returns:
+    - str: The canonical specification, or the stripped input if it cannot be compiled.
+    """
+    try:
+        return compile_period(spec).spec
+    except ValueError:
+        return spec.strip()
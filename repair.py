@@ -0,0 +1,348 @@
+import argparse
+import collections
+import concurrent.futures
+import datetime
+import functools
+import os
+import sqlite3
+
+from habit import Habit
+from period import compile_period, streak_stats
+
+
+HABITS_PER_TASK = 50  # Number of habits recomputed by one worker task
+WRITE_TIMEOUT = 60  # Seconds a worker waits for another worker's write to finish
+
+
+def iter_habit_keys(conn, chunk_size=1000):
+    """
+    Stream the (name, period) pairs of all habits in the habits table.
+
+    Pairs are read in chunks of `chunk_size`, using the last pair of each chunk as the keyset
+    for the next one. No query stays open between chunks, so workers can write to the
+    database while the keys are streamed. Rows without a name or period are left out, see
+    `iter_incomplete_rows`.
+
+    Parameters:
+    - conn: sqlite3.Connection, the database connection.
+    - chunk_size: int, the number of pairs read per query.
+
+    Yields:
+    - tuple: The name and period of the next habit.
+    """
+    c = conn.cursor()
+    key = None
+    while True:
+        if key is None:
+            c.execute('''SELECT DISTINCT name, period FROM habits
+                         WHERE name IS NOT NULL AND period IS NOT NULL
+                         ORDER BY name, period LIMIT ?''', (chunk_size,))
+        else:
+            c.execute('''SELECT DISTINCT name, period FROM habits
+                         WHERE name IS NOT NULL AND period IS NOT NULL AND (name, period) > (?, ?)
+                         ORDER BY name, period LIMIT ?''', key + (chunk_size,))
+        chunk = c.fetchall()
+        if not chunk:
+            break
+        yield from chunk
+        key = chunk[-1]
+
+
+def iter_habit_chunks(conn, name, period, columns, chunk_size=1000):
+    """
+    Stream the rows of one habit in id order, in chunks of `chunk_size`.
+
+    Parameters:
+    - conn: sqlite3.Connection, the database connection.
+    - name: str, the name of the habit.
+    - period: str, the period of the habit.
+    - columns: str, the comma-separated columns to read after the id.
+    - chunk_size: int, the number of rows read per query.
+
+    Yields:
+    - list: The next chunk of rows, each starting with the id.
+    """
+    c = conn.cursor()
+    last_id = 0
+    while True:
+        c.execute(f'''SELECT id, {columns} FROM habits
+                      WHERE name = ? AND period = ? AND id > ?
+                      ORDER BY id LIMIT ?''', (name, period, last_id, chunk_size))
+        chunk = c.fetchall()
+        if not chunk:
+            break
+        yield chunk
+        last_id = chunk[-1][0]
+
+
+def iter_incomplete_rows(conn, chunk_size=1000):
+    """
+    Stream the rows of the habits table that have no name or no period.
+
+    Parameters:
+    - conn: sqlite3.Connection, the database connection.
+    - chunk_size: int, the number of rows read per query.
+
+    Yields:
+    - tuple: The id, name and period of the next such row.
+    """
+    c = conn.cursor()
+    last_id = 0
+    while True:
+        c.execute('''SELECT id, name, period FROM habits
+                     WHERE (name IS NULL OR period IS NULL) AND id > ?
+                     ORDER BY id LIMIT ?''', (last_id, chunk_size))
+        chunk = c.fetchall()
+        if not chunk:
+            break
+        yield from chunk
+        last_id = chunk[-1][0]
+
+
+def recompute_habit(conn, name, period, chunk_size=1000, dry_run=False):
+    """
+    Recompute the streak statistics of every row of a habit from its completion history and
+    write back the values that differ.
+
+    The rows are replayed in id order. Each row gets the statistics of all completions
+    recorded up to and including that row, with periods counted from the earliest creation
+    time of the habit. Rows are streamed in chunks and corrected one chunk at a time. Only the
+    previous row's completions and the running statistics are kept between rows. Since
+    `Habit.save_to_db` stores the full history in every row, usually only the timestamps
+    added after the previous row need to be parsed.
+
+    Parameters:
+    - conn: sqlite3.Connection, the database connection.
+    - name: str, the name of the habit.
+    - period: str, the period specification of the habit.
+    - chunk_size: int, the number of rows read and corrected at once.
+    - dry_run: bool, only count the changes without writing them.
+
+    Returns:
+    - tuple: The number of rows, the number of rows whose stored statistics were wrong, the
+             (old stats, new stats) of the last of them or None, and the list of
+             (name, period, reason) of rows that could not be read. Stats are
+             (streak, longest_streak, missed_periods).
+
+    Raises:
+    - ValueError: If the period is unknown or no row has a valid creation time.
+    """
+    calendar = compile_period(period)
+    anchor = None
+    for chunk in iter_habit_chunks(conn, name, period, 'created_at', chunk_size):
+        for _, created_at in chunk:
+            try:
+                created_at = datetime.datetime.fromisoformat(created_at)
+            except (TypeError, ValueError):
+                continue
+            if anchor is None or created_at < anchor:
+                anchor = created_at
+    if anchor is None:
+        raise ValueError("No row has a valid creation time")
+    index = calendar.indexer(anchor)
+
+    row_count = 0
+    rows_changed = 0
+    last_change = None
+    skipped = []
+    seen_indices = set()
+    stats = (0, 0, 0)  # Streak, longest streak and missed periods of the rows so far
+    previous = 0  # Period index of the latest completion, starting from the creation period
+    previous_completed_at = ''
+    columns = 'completed_at, streak, longest_streak, missed_periods'
+    for chunk in iter_habit_chunks(conn, name, period, columns, chunk_size):
+        updates = []
+        for row_id, completed_at, *stored in chunk:
+            row_count += 1
+            completed_at = completed_at or ''
+            try:
+                new_part = completed_at
+                if (previous_completed_at and completed_at.startswith(previous_completed_at)
+                        and completed_at[len(previous_completed_at):][:1] in ('', ',')):
+                    new_part = completed_at[len(previous_completed_at):]
+                new_indices = {index(datetime.datetime.fromisoformat(timestamp))
+                               for timestamp in new_part.split(',') if timestamp}
+            except (TypeError, ValueError, AttributeError) as error:
+                skipped.append((name, period, f"row {row_id}: {error}"))
+                continue
+            previous_completed_at = completed_at
+            new_indices -= seen_indices
+
+            if new_indices:
+                if seen_indices and min(new_indices) < previous:
+                    # A completion before the latest one, so replay the whole history
+                    seen_indices |= new_indices
+                    stats = streak_stats(seen_indices)
+                else:
+                    # Only later completions, so continue from the current statistics
+                    stats = streak_stats(new_indices, initial=stats + (previous,))
+                    seen_indices |= new_indices
+                previous = max(seen_indices)
+
+            if tuple(stored) != stats:
+                updates.append(stats + (row_id,))
+                last_change = (tuple(stored), stats)
+
+        rows_changed += len(updates)
+        if updates and not dry_run:
+            conn.executemany('''UPDATE habits SET streak=?, longest_streak=?, missed_periods=?
+                                WHERE id=?''', updates)
+            conn.commit()
+    return row_count, rows_changed, last_change, skipped
+
+
+def recompute_batch(db_file, chunk_size, dry_run, keys):
+    """
+    Recompute a batch of habits. This is the unit of work sent to the process pool.
+
+    Each call reads and writes through its own connection, so only the habit keys are sent
+    to the worker and only a summary per habit is sent back.
+
+    Parameters:
+    - db_file: str, the SQLite database file.
+    - chunk_size: int, the number of rows read and corrected at once.
+    - dry_run: bool, only count the changes without writing them.
+    - keys: list of tuples, the (name, period) of the habits to recompute.
+
+    Returns:
+    - tuple: The list of (name, period, row count, rows changed, last change) of every habit,
+             and the list of (name, period, reason) of every habit or row that could not be
+             recomputed.
+    """
+    results = []
+    skipped = []
+    conn = sqlite3.connect(db_file, timeout=WRITE_TIMEOUT)
+    try:
+        for name, period in keys:
+            try:
+                row_count, rows_changed, last_change, skipped_rows = recompute_habit(
+                    conn, name, period, chunk_size, dry_run)
+            except (ValueError, TypeError, AttributeError) as error:
+                skipped.append((name, period, str(error)))
+                continue
+            results.append((name, period, row_count, rows_changed, last_change))
+            skipped.extend(skipped_rows)
+    finally:
+        conn.close()
+    return results, skipped
+
+
+def iter_batches(items, batch_size):
+    """
+    Group items into lists of at most `batch_size` items.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bounded_map(executor, func, iterable, max_pending):
+    """
+    Map a function over an iterable in an executor, in order, with at most `max_pending`
+    calls in flight, so that the iterable is consumed only as fast as results are used.
+    """
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def repair_streaks(db_file=None, chunk_size=1000, workers=None, dry_run=False):
+    """
+    Recompute the streak, longest streak and missed periods of every habit row from its
+    completion history and write back the values that differ.
+
+    Habit keys are streamed from the database in chunks and handed to a process pool in
+    batches, with a bounded number of batches in flight. Each worker streams the rows of its
+    habits in chunks and corrects them with bulk updates. Memory use is therefore bounded by
+    the chunk size, the longest single `completed_at` value and the number of distinct
+    periods of one habit, not by the size of the database.
+
+    Parameters:
+    - db_file: str or None, the SQLite database file, `Habit.db_file` by default.
+    - chunk_size: int, the number of rows or habit keys read per query.
+    - workers: int or None, the number of worker processes, the number of CPUs by default.
+               With 1, everything runs in the current process.
+    - dry_run: bool, only report the changes without writing them. Stored periods are only
+               rewritten to their canonical form when this is False.
+
+    Returns:
+    - dict: A report with the number of habits and rows checked, the number of rows changed,
+            the number of rows whose period was rewritten to its canonical form,
+            the changed habits as (name, period, rows changed, old stats, new stats) with the
+            stats of their latest changed row, and the skipped habits and rows as
+            (name, period, reason).
+    """
+    db_file = db_file or Habit.db_file
+    workers = workers or os.cpu_count() or 1
+    report = {"habits": 0, "rows": 0, "rows_changed": 0, "periods_normalized": 0,
+              "changed_habits": [], "skipped": []}
+
+    conn = sqlite3.connect(db_file)
+    executor = None
+    try:
+        Habit.create_table(db_file)
+        if not dry_run:
+            # Habits are grouped by their canonical period, like the app looks them up
+            report["periods_normalized"] = Habit.normalize_stored_periods(db_file)
+        for row_id, name, period in iter_incomplete_rows(conn, chunk_size):
+            report["skipped"].append((name, period, f"row {row_id} has no name or period"))
+
+        batches = iter_batches(iter_habit_keys(conn, chunk_size), HABITS_PER_TASK)
+        task = functools.partial(recompute_batch, db_file, chunk_size, dry_run)
+        if workers == 1:
+            results = map(task, batches)
+        else:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            results = bounded_map(executor, task, batches, workers * 2)
+
+        for habit_results, skipped in results:
+            for name, period, row_count, rows_changed, last_change in habit_results:
+                report["habits"] += 1
+                report["rows"] += row_count
+                if rows_changed:
+                    report["rows_changed"] += rows_changed
+                    old_stats, new_stats = last_change
+                    report["changed_habits"].append((name, period, rows_changed, old_stats, new_stats))
+            report["skipped"].extend(skipped)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        conn.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute stored habit streaks and missed periods from the completion history.")
+    parser.add_argument("--db", default=Habit.db_file, help="SQLite database file (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows read and processed per batch")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--dry-run", action="store_true", help="report the changes without writing them")
+    args = parser.parse_args()
+
+    report = repair_streaks(args.db, chunk_size=args.chunk_size, workers=args.workers, dry_run=args.dry_run)
+
+    for name, period, rows_changed, old_stats, new_stats in report["changed_habits"]:
+        print(f"Habit '{name}' ({period}): {rows_changed} row(s) corrected, latest "
+              f"streak/longest/missed {old_stats[0]}/{old_stats[1]}/{old_stats[2]} -> "
+              f"{new_stats[0]}/{new_stats[1]}/{new_stats[2]}")
+    for name, period, reason in report["skipped"]:
+        print(f"Habit '{name}' ({period}) skipped: {reason}")
+    action = "would be corrected" if args.dry_run else "corrected"
+    if report["periods_normalized"]:
+        print(f"Rewrote the period of {report['periods_normalized']} rows to its canonical form.")
+    print(f"Checked {report['habits']} habits in {report['rows']} rows, "
+          f"{report['rows_changed']} rows {action}.")
+
+
+if __name__ == "__main__":
+    main()
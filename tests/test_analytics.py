@@ -127,3 +127,82 @@ def test_get_longest_run_streak(db_connection):
         # Test getting the longest streak for a habit with no records
         longest_streak_none = Habit.get_longest_run_streak("Sleep", "daily")
         assert longest_streak_none == 0
+
+
+def test_iter_all_habits_pagination(db_connection):
+    """
+    Test the keyset pagination of the `iter_all_habits` method of the Habit class.
+
+    This test pages through all habits two names at a time and verifies that the pages join up
+    to the sorted list returned by `get_all_habits` without gaps or duplicates.
+    """
+    with db_connection:
+        all_habits = Habit.get_all_habits()
+
+        pages = []
+        last_name = None
+        while True:
+            page = list(Habit.iter_all_habits(after=last_name, limit=2))
+            if not page:
+                break
+            pages.extend(page)
+            last_name = page[-1]
+
+    assert all_habits == sorted(set(all_habits))
+    assert pages == all_habits
+
+
+def test_iter_habits_by_period(db_connection):
+    """
+    Test the `iter_habits_by_period` method of the Habit class, including descending order.
+    """
+    with db_connection:
+        weekly_habits = list(Habit.iter_habits_by_period("weekly", descending=True))
+        assert weekly_habits == ["Grocery Shopping", "Clean House"]
+
+        # Only names sorted before the keyset are returned when descending
+        assert list(Habit.iter_habits_by_period("weekly", after="Grocery Shopping", descending=True)) == ["Clean House"]
+        assert list(Habit.iter_habits_by_period("daily", limit=1)) == ["Exercise"]
+        assert Habit.get_habits_page("weekly", after="Clean House") == ["Grocery Shopping"]
+
+
+def test_analytics_cache(db_connection):
+    """
+    Test that analytics results are cached and invalidated when the database changes.
+
+    This test repeats an analytics query to get a cache hit, then writes to the database both
+    through the Habit class and through a separate connection, and verifies that the cached
+    results are dropped each time.
+    """
+    Habit.analytics_cache.clear()
+
+    first = Habit.get_all_habits()
+    second = Habit.get_all_habits()
+    assert first == second
+    assert Habit.analytics_cache.stats()["hits"] == 1
+
+    # Modifying a returned list does not change the cached result
+    second.append("Not a habit")
+    assert Habit.get_all_habits() == first
+
+    # A write through the Habit class invalidates the cache
+    habit = Habit("Cache Test", "daily")
+    habit.save_to_db()
+    assert "Cache Test" in Habit.get_all_habits()
+    habit.delete_habit()
+    assert "Cache Test" not in Habit.get_all_habits()
+
+    # A write from another connection invalidates the cache as well
+    with db_connection:
+        db_connection.execute("DELETE FROM habits WHERE name = 'Meditation' AND period = 'weekly'")
+        db_connection.execute('''INSERT INTO habits (name, period, created_at, completed_at, streak,
+                                                     longest_streak, missed_periods)
+                                 VALUES ('Meditation', 'weekly', '2024-08-01 09:00:00', '', 0, 0, 0)''')
+    assert Habit.get_habits_by_period("weekly") == ["Clean House", "Grocery Shopping", "Meditation"]
+    with db_connection:
+        db_connection.execute("DELETE FROM habits WHERE name = 'Meditation' AND period = 'weekly'")
+    assert Habit.get_habits_by_period("weekly") == ["Clean House", "Grocery Shopping"]
+
+    stats = Habit.analytics_cache.stats()
+    assert stats["invalidations"] >= 4
+    assert 0 < stats["hit_rate"] < 1
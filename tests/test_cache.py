@@ -0,0 +1,118 @@
+import sys
+import os
+import threading
+
+# Add the parent directory of `cache.py` to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache import AnalyticsCache
+
+# Test the least-recently-used eviction
+def test_cache_eviction():
+    """
+    Test that the least recently used result is evicted once the cache is full.
+    """
+    cache = AnalyticsCache(maxsize=2)
+    calls = []
+
+    @cache.memoize
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    assert square(1) == 1
+    assert square(2) == 4
+    assert square(1) == 1  # Hit, makes 2 the least recently used result
+    assert square(3) == 9  # Evicts 2
+    assert square(1) == 1
+    assert square(2) == 4
+    assert calls == [1, 2, 3, 2]
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+    assert stats["evictions"] == 2
+    assert stats["size"] == 2
+    assert stats["hit_rate"] == 2 / 6
+
+# Test the invalidation by data version
+def test_cache_version_invalidation():
+    """
+    Test that all results are dropped when the data version changes.
+    """
+    version = [0]
+    cache = AnalyticsCache(version=lambda: version[0])
+    calls = []
+
+    @cache.memoize
+    def lookup(key, default=None):
+        calls.append(key)
+        return [key]
+
+    assert lookup("a") == ["a"]
+    assert lookup("a") == ["a"]
+    assert lookup("a", default=1) == ["a"]  # Keyword arguments are part of the key
+    version[0] += 1
+    assert lookup("a") == ["a"]
+    assert calls == ["a", "a", "a"]
+    assert cache.stats()["invalidations"] == 1
+
+    # Unhashable arguments bypass the cache
+    assert lookup(["b"]) == [["b"]]
+    assert cache.stats()["misses"] == 3
+
+# Test the use of one cache from several threads
+def test_cache_threads():
+    """
+    Test that concurrent lookups, evictions and invalidations keep the cache consistent.
+    """
+    version = [0]
+    cache = AnalyticsCache(maxsize=8, version=lambda: version[0] // 50)
+    errors = []
+
+    @cache.memoize
+    def double(x):
+        return [x * 2]
+
+    def worker():
+        try:
+            for i in range(500):
+                version[0] += 1
+                assert double(i % 16) == [(i % 16) * 2]
+        except Exception as error:  # Collected because exceptions do not leave the thread
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 500
+    assert stats["size"] <= 8
+
+# Test the binding of arguments into cache keys
+def test_cache_key_binding():
+    """
+    Test that equivalent calls share one cache entry.
+
+    Positional and keyword arguments, omitted defaults and values brought into one form by
+    `normalize` all lead to the same key.
+    """
+    cache = AnalyticsCache()
+    calls = []
+
+    @cache.memoize(normalize={"period": str.lower})
+    def page(period=None, after=None, limit=20):
+        calls.append((period, after, limit))
+        return [period]
+
+    assert page("weekly") == ["weekly"]
+    assert page(period="weekly") == ["weekly"]
+    assert page("Weekly", None, 20) == ["weekly"]
+    assert page("weekly", limit=20) == ["weekly"]
+    assert page() == [None]
+    assert calls == [("weekly", None, 20), (None, None, 20)]
+    assert cache.stats()["size"] == 2
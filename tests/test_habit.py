@@ -4,6 +4,7 @@ import sys
 import os
 import pytest
 import sqlite3
+import datetime
 
 # Add the parent directory of `habit.py` to the sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -95,3 +96,91 @@ def test_delete_habit(db_connection, habit):
         result = c.fetchone()
 
     assert result is None
+
+# Test the `calculate_streak` method.
+def test_calculate_streak(habit):
+    """
+    Test the `calculate_streak` method of the Habit class.
+
+    This test checks off a habit on consecutive days, twice on the last one, and verifies that
+    the streak and missed periods are derived from the whole history.
+
+    Args:
+        habit: The `Habit` instance to check off.
+
+    Returns:
+        None
+    """
+    habit.created_at = datetime.datetime(2024, 8, 1, 9, 0)
+    for day in (10, 11, 12, 12):
+        habit.completed_at.append(datetime.datetime(2024, 8, day, 18, 0))
+        habit.calculate_streak()
+
+    assert habit.streak == 3
+    assert habit.longest_streak == 3
+    assert habit.missed_periods == 8
+
+# Test the `check_off` method on a stored habit.
+def test_check_off_keeps_longest_streak(db_connection):
+    """
+    Test that checking off a stored habit keeps the longest streak of its history.
+
+    The seeded 'Exercise' habit was completed on 31 days in a row, one completion per row. A
+    new check-off starts a new streak but must not lower the longest streak.
+
+    Args:
+        db_connection: The database connection fixture.
+
+    Returns:
+        None
+    """
+    habit = Habit("Exercise", "daily")
+    habit.load_from_db()
+    assert habit.longest_streak == 31
+
+    habit.check_off()
+    try:
+        assert habit.streak == 1
+        assert habit.longest_streak == 31
+        assert Habit.get_longest_run_streak("Exercise", "daily") == 31
+    finally:
+        with db_connection:
+            db_connection.execute('''DELETE FROM habits WHERE id = (SELECT MAX(id) FROM habits
+                                     WHERE name = 'Exercise' AND period = 'daily')''')
+
+# Test the normalization of stored periods.
+def test_normalize_stored_periods(tmp_path, monkeypatch):
+    """
+    Test that free-text periods stored by earlier versions can be found after upgrading.
+
+    This test stores rows with a non-canonical period in a database from before the period
+    normalization, opens it through the Habit class and verifies that the rows are found.
+
+    Args:
+        tmp_path: The temporary directory fixture.
+        monkeypatch: The monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    db_file = str(tmp_path / 'habits.db')
+    monkeypatch.setattr(Habit, 'db_file', db_file)
+    with sqlite3.connect(db_file) as conn:
+        conn.execute('''CREATE TABLE habits
+                        (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, period TEXT, created_at TEXT,
+                         completed_at TEXT, streak INTEGER, longest_streak INTEGER, missed_periods INTEGER)''')
+        conn.execute('''INSERT INTO habits (name, period, created_at, completed_at, streak, longest_streak,
+                                            missed_periods)
+                        VALUES ('Swim', 'Daily', '2024-08-01 09:00:00', '2024-08-01 10:00:00', 1, 1, 0)''')
+
+    habit = Habit("Swim", "Daily")
+    habit.load_from_db()
+    assert habit.longest_streak == 1
+    assert Habit.check_habit_exists("Swim", "daily")
+    assert Habit.get_habits_by_period("DAILY") == ["Swim"]
+
+    # Periods written around the Habit class are normalized on request
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("UPDATE habits SET period = 'Every 1 Day'")
+    assert Habit.normalize_stored_periods() == 1
+    assert Habit.get_longest_run_streak("Swim", "daily") == 1
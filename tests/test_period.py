@@ -0,0 +1,101 @@
+import sys
+import os
+import datetime
+import pytest
+
+# Add the parent directory of `period.py` to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from period import compile_period, normalize_period, streak_stats
+
+# Test the canonical form of period specifications
+def test_normalize_period():
+    """
+    Test that equivalent period specifications share one canonical form.
+    """
+    assert normalize_period("Daily") == "daily"
+    assert normalize_period("every 7 days") == "weekly"
+    assert normalize_period("every 1 week") == "weekly"
+    assert normalize_period("every 2 weeks") == "every 14 days"
+    assert normalize_period("on Friday, mon") == "on mon,fri"
+    assert normalize_period("on mon,tue,wed,thu,fri,sat,sun") == "daily"
+    assert normalize_period("monthly@UTC") == "monthly@UTC"
+    assert normalize_period("monthly @ utc") == "monthly@UTC"
+    assert normalize_period("Daily@europe/berlin") == "daily@Europe/Berlin"
+    # Unknown specifications are kept as they are
+    assert normalize_period(" fortnightly ") == "fortnightly"
+
+    with pytest.raises(ValueError):
+        compile_period("fortnightly")
+    with pytest.raises(ValueError):
+        compile_period("every 0 days")
+
+# Test the period index functions
+def test_period_indices():
+    """
+    Test the period indices of the different period types.
+
+    This test maps timestamps to period indices for anchored, calendar and weekday periods and
+    verifies that the single and batch forms agree.
+
+    Returns:
+        None
+    """
+    anchor = datetime.datetime(2024, 8, 1, 9, 0)  # A Thursday
+    timestamps = [datetime.datetime(2024, 8, day, 18, 0) for day in (1, 4, 5, 7, 8, 14, 15)]
+
+    assert compile_period("daily").indices(timestamps, anchor) == [0, 3, 4, 6, 7, 13, 14]
+    assert compile_period("weekly").indices(timestamps, anchor) == [0, 0, 0, 0, 1, 1, 2]
+    assert compile_period("every 3 days").indices(timestamps, anchor) == [0, 1, 1, 2, 2, 4, 4]
+    # ISO weeks start on Monday, the 5th and the 12th of August 2024
+    assert compile_period("isoweekly").indices(timestamps, anchor) == [0, 0, 1, 1, 1, 2, 2]
+    # Each Monday and Friday opens a period that lasts until the next scheduled day
+    assert compile_period("on mon,fri").indices(timestamps, anchor) == [0, 1, 2, 2, 2, 4, 4]
+
+    monthly = compile_period("monthly")
+    assert monthly.index(datetime.date(2024, 9, 30), anchor) == 1
+    assert monthly.index(datetime.date(2025, 1, 1), anchor) == 5
+    assert compile_period("every 2 months").index(datetime.date(2024, 10, 1), anchor) == 1
+
+    for spec in ("daily", "weekly", "isoweekly", "on mon,fri", "monthly"):
+        period = compile_period(spec)
+        assert period.indices(timestamps, anchor) == [period.index(ts, anchor) for ts in timestamps]
+
+# Test timezone-aware periods
+def test_timezone_period():
+    """
+    Test that aware timestamps are mapped using the wall clock of the period's timezone.
+    """
+    utc = datetime.timezone.utc
+    anchor = datetime.datetime(2024, 8, 1, 12, 0, tzinfo=utc)
+    late_evening = datetime.datetime(2024, 8, 1, 23, 30, tzinfo=utc)
+
+    # 23:30 UTC is already the next day in Berlin
+    assert compile_period("daily@UTC").index(late_evening, anchor) == 0
+    assert compile_period("daily@Europe/Berlin").index(late_evening, anchor) == 1
+
+    # Naive timestamps, as stored by the app, are converted from the system's local time
+    naive = datetime.datetime(2024, 8, 1, 23, 30)
+    utc_daily = compile_period("daily@UTC")
+    assert utc_daily.index(naive) == compile_period("daily").index(naive.astimezone(utc))
+
+    with pytest.raises(ValueError):
+        compile_period("daily@Nowhere/Special")
+
+# Test the streak statistics
+def test_streak_stats():
+    """
+    Test the current streak, longest streak and missed periods computed from period indices.
+    """
+    assert streak_stats([]) == (0, 0, 0)
+    assert streak_stats([0, 1, 2, 3]) == (4, 4, 0)
+    # Duplicates within a period count once, and the period after creation is not missed
+    assert streak_stats([1, 1, 2]) == (2, 2, 0)
+    assert streak_stats([0, 1, 2, 5, 6]) == (2, 3, 2)
+    # Continuing from the statistics of [0, 1, 2] gives the same result
+    assert streak_stats([5, 6], initial=streak_stats([0, 1, 2]) + (2,)) == (2, 3, 2)
+
+    weekly = compile_period("weekly")
+    anchor = datetime.datetime(2024, 8, 1, 9, 0)
+    completions = [datetime.datetime(2024, 8, day, 18, 0) for day in (7, 14, 21, 28)]
+    assert weekly.streak_stats(completions, anchor) == (4, 4, 0)
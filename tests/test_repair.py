@@ -0,0 +1,157 @@
+import sys
+import os
+import pytest
+import sqlite3
+
+# Add the parent directory of `repair.py` to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import setup
+from habit import Habit
+from repair import repair_streaks
+
+# Build a small database with drifted streak columns
+@pytest.fixture
+def drifted_db(tmp_path, monkeypatch):
+    """
+    Set up a temporary database whose stored streak statistics disagree with the history.
+
+    Returns:
+        str: The path of the database file.
+    """
+    db_file = str(tmp_path / 'habits.db')
+    monkeypatch.setattr(Habit, 'db_file', db_file)
+    Habit.create_table()
+
+    rows = [
+        # Correct rows, one completion per day
+        ("Exercise", "daily", "2024-08-01 06:30:00", "2024-08-01 07:20:00", 1, 1, 0),
+        ("Exercise", "daily", "2024-08-02 06:30:00", "2024-08-02 07:05:00", 2, 2, 0),
+        # Two days missed, so the streak restarts
+        ("Exercise", "daily", "2024-08-05 06:30:00", "2024-08-05 07:05:00", 3, 3, 0),
+        # One row holding the whole history, with a completion listed out of order
+        ("Clean House", "weekly", "2024-08-01 09:00:00",
+         "2024-08-21 18:00:00,2024-08-07 18:00:00,2024-08-14 18:00:00", 0, 0, 5),
+        # A period that cannot be tracked
+        ("Nap", "hourly", "2024-08-01 09:00:00", "2024-08-01 10:00:00", 7, 7, 0),
+        # Corrupted rows without a name or period, sorted before all others
+        (None, "daily", "2024-08-01 09:00:00", "2024-08-01 10:00:00", 7, 7, 0),
+        ("Stretch", None, "2024-08-01 09:00:00", "2024-08-01 10:00:00", 7, 7, 0),
+        # A timestamp that is not text
+        ("Walk", "daily", b"2024-08-01 09:00:00", "2024-08-01 10:00:00", 7, 7, 0),
+    ]
+    with sqlite3.connect(db_file) as conn:
+        conn.executemany('''INSERT INTO habits (name, period, created_at, completed_at, streak, longest_streak,
+                                                missed_periods) VALUES (?, ?, ?, ?, ?, ?, ?)''', rows)
+    return db_file
+
+def read_stats(db_file):
+    """
+    Read the stored statistics of all rows in id order.
+    """
+    with sqlite3.connect(db_file) as conn:
+        return conn.execute('SELECT name, streak, longest_streak, missed_periods FROM habits ORDER BY id').fetchall()
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_repair_streaks(drifted_db, workers):
+    """
+    Test that `repair_streaks` recomputes drifted statistics from the completion history.
+
+    This test repairs the database with and without a process pool, using a chunk size that
+    splits habits across chunks, and verifies the corrected values and the report.
+
+    Args:
+        drifted_db: The temporary database fixture.
+        workers: The number of worker processes.
+
+    Returns:
+        None
+    """
+    dry_report = repair_streaks(drifted_db, chunk_size=2, workers=workers, dry_run=True)
+    assert dry_report["rows_changed"] == 2
+    assert read_stats(drifted_db)[2] == ("Exercise", 3, 3, 0)
+
+    report = repair_streaks(drifted_db, chunk_size=2, workers=workers)
+    assert report["habits"] == 2
+    assert report["rows"] == 4
+    assert report["rows_changed"] == 2
+    assert sorted(report["changed_habits"]) == [
+        ("Clean House", "weekly", 1, (0, 0, 5), (3, 3, 0)),
+        ("Exercise", "daily", 1, (3, 3, 0), (1, 2, 2)),
+    ]
+    assert [(name, period) for name, period, _ in report["skipped"]] == [
+        (None, "daily"), ("Stretch", None), ("Nap", "hourly"), ("Walk", "daily")]
+
+    assert read_stats(drifted_db) == [
+        ("Exercise", 1, 1, 0),
+        ("Exercise", 2, 2, 0),
+        ("Exercise", 1, 2, 2),
+        ("Clean House", 3, 3, 0),
+        ("Nap", 7, 7, 0),
+        (None, 7, 7, 0),
+        ("Stretch", 7, 7, 0),
+        ("Walk", 7, 7, 0),
+    ]
+
+    # A second run finds nothing left to repair
+    assert repair_streaks(drifted_db, chunk_size=2, workers=workers)["rows_changed"] == 0
+
+def test_repair_streaks_history_rows(tmp_path, monkeypatch):
+    """
+    Test `repair_streaks` on rows that each hold the full history, as written by `save_to_db`.
+
+    The habit spans several chunks, contains a row with a malformed timestamp and ends with a
+    row whose history starts over with an earlier completion.
+    """
+    db_file = str(tmp_path / 'habits.db')
+    monkeypatch.setattr(Habit, 'db_file', db_file)
+    Habit.create_table()
+
+    created_at = "2024-08-01 09:00:00"
+    histories = [
+        "2024-08-10 18:00:00",
+        "2024-08-10 18:00:00,2024-08-11 18:00:00",
+        "2024-08-10 18:00:00,2024-08-11 18:00:00,yesterday",
+        "2024-08-10 18:00:00,2024-08-11 18:00:00,2024-08-12 07:00:00,2024-08-12 18:00:00",
+        "2024-08-05 18:00:00",
+    ]
+    with sqlite3.connect(db_file) as conn:
+        conn.executemany('''INSERT INTO habits (name, period, created_at, completed_at, streak, longest_streak,
+                                                missed_periods) VALUES ('Run', 'daily', ?, ?, 0, 0, 0)''',
+                         [(created_at, history) for history in histories])
+
+    report = repair_streaks(db_file, chunk_size=2, workers=1)
+    assert report["rows"] == 5
+    assert report["rows_changed"] == 4
+    assert [reason.split(':')[0] for _, _, reason in report["skipped"]] == ["row 3"]
+
+    # Each period counts once, and the earlier completion in the last row replays the history
+    assert [stats for _, *stats in read_stats(db_file)] == [
+        [1, 1, 8], [2, 2, 8], [0, 0, 0], [3, 3, 8], [3, 3, 7]]
+
+def test_repair_after_check_off(tmp_path, monkeypatch):
+    """
+    Test that the repair tool agrees with the statistics stored by `check_off`.
+
+    This test seeds a database with the dummy data, checks off a habit the normal way and
+    verifies that a repair run finds nothing to correct.
+    """
+    db_file = str(tmp_path / 'habits.db')
+    monkeypatch.setattr(Habit, 'db_file', db_file)
+    setup.setup_predefined_habits()
+
+    habit = Habit("Exercise", "daily")
+    habit.load_from_db()
+    habit.check_off()
+    habit.check_off()
+
+    report = repair_streaks(db_file, workers=1, dry_run=True)
+    assert report["rows_changed"] == 0
+    assert report["skipped"] == []
+
+    # A period written around the Habit class is normalized before the habit is recomputed
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("UPDATE habits SET period = 'Daily' WHERE id = (SELECT MIN(id) FROM habits)")
+    report = repair_streaks(db_file, workers=1)
+    assert report["periods_normalized"] == 1
+    assert report["rows_changed"] == 0